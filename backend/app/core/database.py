@@ -0,0 +1,45 @@
+"""
+Database connection management for EchoMind.
+Owns the pooled async SQLAlchemy engine, created once in the app lifespan.
+"""
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app.core.config import settings
+
+
+def _async_database_url(url: str) -> str:
+    """Select the asyncpg driver for plain postgresql:// URLs."""
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def create_db_engine() -> AsyncEngine:
+    """
+    Create the pooled async engine. No connection is opened until first use.
+    
+    Returns:
+        AsyncEngine configured from the DB_* settings
+    """
+    return create_async_engine(
+        _async_database_url(settings.DATABASE_URL),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+async def get_db(request: Request) -> AsyncIterator[AsyncConnection]:
+    """Dependency yielding a pooled connection inside a transaction."""
+    engine = request.app.state.db
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Database is not available")
+    
+    async with engine.begin() as conn:
+        yield conn
@@ -4,18 +4,31 @@ Main application entry point and API configuration.
 """
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from pydantic import TypeAdapter
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import uuid
+from functools import partial
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+
+import orjson
+from cachetools.func import ttl_cache
 
 from app.core.config import settings
+from app.core.database import create_db_engine
 from app.models.schemas import (
     QueryRequest, QueryResponse, HealthCheckResponse,
-    IngestDocumentRequest, UrgencyLevel, ResourceRecommendation
+    IngestDocumentRequest, UrgencyLevel, ResourceRecommendation,
+    EmergencyContact, SynthesizedAnswer
 )
+from app.services.query_batcher import QueryBatcher
 from app.services.rag_service import RAGService
 from app.services.urgency_classifier import UrgencyClassifier
+from app.utils.clock import run_clock, utc_now
+from app.utils.ids import new_response_id
 from loguru import logger
 
 # Global service instances
@@ -33,15 +46,57 @@ async def lifespan(app: FastAPI):
     try:
         rag_service = RAGService()
         urgency_classifier = UrgencyClassifier()
+        _warm_up_services()
+        clock_task = asyncio.create_task(run_clock())
+        # Worker pool for CPU-bound retrieval/classification so the event
+        # loop stays free to accept requests
+        app.state.pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        # Batching pays off when queries share an encoder call and index
+        # search; BM25 scores each query independently
+        app.state.batcher = None
+        if rag_service.index is not None:
+            app.state.batcher = QueryBatcher(
+                rag_service,
+                app.state.pool,
+                max_batch_size=settings.QUERY_BATCH_MAX_SIZE,
+                max_delay=settings.QUERY_BATCH_MAX_DELAY_MS / 1000
+            )
+            app.state.batcher.start()
         logger.info("✓ All services initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize services: {e}")
         raise
     
+    # The database is optional for now; the API runs without a driver
+    try:
+        app.state.db = create_db_engine()
+        logger.info(f"✓ Database pool configured (size={settings.DB_POOL_SIZE})")
+    except Exception as e:
+        app.state.db = None
+        logger.warning(f"Database pool unavailable: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down EchoMind services...")
+    clock_task.cancel()
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+    if app.state.db is not None:
+        await app.state.db.dispose()
+    app.state.pool.shutdown(wait=True)
+
+
+def _warm_up_services() -> None:
+    """Run each service once so the first user request hits a warm path."""
+    if rag_service.model is not None:
+        # Bound intra-op threads so pool workers don't oversubscribe cores
+        import torch
+        torch.set_num_threads(settings.TORCH_NUM_THREADS)
+    
+    rag_service.warm_up()
+    urgency_classifier.classify_urgency("warmup")
+    logger.info("✓ Services warmed up")
 
 
 # Create FastAPI application
@@ -75,30 +130,36 @@ def get_urgency_classifier() -> UrgencyClassifier:
 
 
 # Health Check Endpoint
+@ttl_cache(maxsize=1, ttl=0.5)
+def _service_statuses() -> Dict[str, str]:
+    """Per-service health, memoized so frequent probes share one check."""
+    rag_stats = rag_service.get_collection_stats()
+    rag_status = "healthy" if rag_stats.get("status") in ["healthy", "empty"] else "unhealthy"
+    return {
+        "rag_service": rag_status,
+        "urgency_classifier": "healthy",
+        "vector_db": rag_stats.get("status", "unknown")
+    }
+
+
 @app.get("/health", response_model=HealthCheckResponse)
 async def health_check():
     """Health check endpoint to verify service status."""
     try:
-        # Check RAG service
-        rag_stats = rag_service.get_collection_stats()
-        rag_status = "healthy" if rag_stats.get("status") in ["healthy", "empty"] else "unhealthy"
+        services = _service_statuses()
         
         return HealthCheckResponse(
-            status="healthy" if rag_status == "healthy" else "degraded",
+            status="healthy" if services["rag_service"] == "healthy" else "degraded",
             version="1.0.0",
-            timestamp=datetime.utcnow(),
-            services={
-                "rag_service": rag_status,
-                "urgency_classifier": "healthy",
-                "vector_db": rag_stats.get("status", "unknown")
-            }
+            timestamp=utc_now(),
+            services=services
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return HealthCheckResponse(
             status="unhealthy",
             version="1.0.0",
-            timestamp=datetime.utcnow(),
+            timestamp=utc_now(),
             services={
                 "error": str(e)
             }
@@ -121,39 +182,47 @@ async def process_query(
         logger.info(f"Processing query: {request.query[:50]}...")
         
         # Generate response ID
-        response_id = str(uuid.uuid4())
+        response_id = new_response_id()
         
-        # 1. Classify urgency level
-        urgency_level, emergency_contacts = classifier.classify_urgency(request.query)
-        logger.info(f"Urgency level: {urgency_level}")
+        loop = asyncio.get_running_loop()
+        pool = app.state.pool
+        # Normalize once; retrieval and synthesis share the folded query
+        query_folded = rag.fold_query(request.query)
+        batcher = app.state.batcher
+        if batcher is not None:
+            retrieval = batcher.submit(request.query, query_folded)
+        else:
+            retrieval = loop.run_in_executor(
+                pool, partial(rag.retrieve_relevant_documents, request.query, query_folded=query_folded)
+            )
         
-        # 2. Retrieve relevant documents from vector store
-        retrieved_docs = rag.retrieve_relevant_documents(request.query)
+        # 1-2. Classify urgency level and retrieve relevant documents concurrently
+        (urgency_level, risk_score, emergency_contacts), retrieved_docs = await asyncio.gather(
+            loop.run_in_executor(pool, partial(classifier.classify_and_score, query_folded, normalized=True)),
+            retrieval,
+        )
+        logger.info(f"Urgency level: {urgency_level} (risk score {risk_score:.2f})")
         logger.info(f"Retrieved {len(retrieved_docs)} relevant documents")
         
         # 3. Synthesize answer from retrieved documents
-        synthesized_answer = rag.synthesize_answer(request.query, retrieved_docs)
-        
-        # 4. Generate resource recommendations (mock for now)
-        recommended_resources = _generate_mock_resources(urgency_level, request.user_location)
-        
-        # 5. Generate next steps
-        next_steps = _generate_next_steps(urgency_level)
+        synthesized_answer = await loop.run_in_executor(
+            pool, partial(rag.synthesize_answer, request.query, retrieved_docs, query_folded=query_folded)
+        )
         
-        # Build response
-        response = QueryResponse(
+        # 4-5. Resource recommendations (mock for now) and next steps are
+        # static per urgency level and spliced in as pre-serialized JSON
+        body = _render_query_response(
             response_id=response_id,
             session_id=request.session_id,
             urgency_level=urgency_level,
             emergency_contacts=emergency_contacts,
             synthesized_answer=synthesized_answer,
-            recommended_resources=recommended_resources,
-            next_steps=next_steps,
-            timestamp=datetime.utcnow()
+            user_location=request.user_location,
+            timestamp=utc_now()
         )
         
         logger.info(f"Query processed successfully. Response ID: {response_id}")
-        return response
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error processing query: {e}")
@@ -165,7 +234,7 @@ async def process_query(
 async def ingest_document(
     request: IngestDocumentRequest,
     rag: RAGService = Depends(get_rag_service)
-):
+) -> Dict[str, Any]:
     """
     Ingest a new document into the knowledge base.
     
@@ -180,16 +249,21 @@ async def ingest_document(
             # In production, fetch content from URL
             raise HTTPException(status_code=400, detail="URL fetching not implemented yet. Please provide document_text.")
         
-        # Ingest document
-        result = rag.ingest_document(
-            document_text=document_text,
-            source_name=request.source_name,
-            source_type=request.source_type,
-            source_url=request.document_url,
-            metadata=request.metadata
+        # Ingest document (chunking/embedding is CPU-bound, keep it off the loop)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            app.state.pool,
+            partial(
+                rag.ingest_document,
+                document_text=document_text,
+                source_name=request.source_name,
+                source_type=request.source_type,
+                source_url=request.document_url,
+                metadata=request.metadata
+            )
         )
         
-        return JSONResponse(content=result)
+        return result
         
     except Exception as e:
         logger.error(f"Error ingesting document: {e}")
@@ -198,96 +272,157 @@ async def ingest_document(
 
 # Stats Endpoint
 @app.get(f"{settings.API_V1_PREFIX}/stats")
-async def get_stats(rag: RAGService = Depends(get_rag_service)):
+async def get_stats(rag: RAGService = Depends(get_rag_service)) -> Dict[str, Any]:
     """Get statistics about the knowledge base."""
     try:
-        stats = rag.get_collection_stats()
-        return JSONResponse(content=stats)
+        return rag.get_collection_stats()
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Helper Functions
+# Static recommendations are immutable, so build them once at import time
+_CRISIS_HOTLINE = ResourceRecommendation(
+    resource_id="crisis_hotline",
+    name="24/7 Crisis Hotline",
+    resource_type="hotline",
+    description="Immediate crisis support available now",
+    location="National",
+    cost_range="Free",
+    contact_info={"phone": "988"},
+    trust_score=1.0,
+    match_score=1.0
+)
+
+_UNIVERSITY_COUNSELING = ResourceRecommendation(
+    resource_id="university_counseling",
+    name="University Counseling Center",
+    resource_type="counselor",
+    description="Professional counseling services for students",
+    location="Campus",
+    cost_range="Free for students",
+    contact_info={"website": "https://counseling.university.edu"},
+    trust_score=0.95,
+    match_score=0.9
+)
+
+_MINDFULNESS_APP = ResourceRecommendation(
+    resource_id="mental_health_app",
+    name="Mindfulness & Meditation App",
+    resource_type="self_help",
+    description="Guided meditation and stress relief exercises",
+    location="Online",
+    cost_range="Free - $10/month",
+    contact_info={"website": "https://example-app.com"},
+    trust_score=0.85,
+    match_score=0.75
+)
+
+_NEXT_STEPS = {
+    UrgencyLevel.CRITICAL: (
+        "Call 988 immediately for crisis support",
+        "Go to your nearest emergency room if you're in immediate danger",
+        "Reach out to a trusted friend or family member",
+        "Use the Crisis Text Line: Text HOME to 741741"
+    ),
+    UrgencyLevel.HIGH: (
+        "Contact a crisis hotline for immediate support",
+        "Schedule an urgent appointment with a mental health professional",
+        "Reach out to your support network",
+        "Practice grounding techniques to manage acute distress"
+    ),
+    UrgencyLevel.MEDIUM: (
+        "Schedule an appointment with a counselor",
+        "Explore self-help resources and coping strategies",
+        "Connect with a support group",
+        "Practice self-care activities"
+    ),
+    UrgencyLevel.LOW: (
+        "Explore the recommended resources",
+        "Learn more about mental wellness practices",
+        "Consider preventive mental health support",
+        "Build a self-care routine"
+    ),
+}
+
+
 def _generate_mock_resources(urgency: UrgencyLevel, location: str = None) -> list:
     """Generate mock resource recommendations."""
     resources = []
     
     if urgency in [UrgencyLevel.CRITICAL, UrgencyLevel.HIGH]:
-        resources.append(ResourceRecommendation(
-            resource_id="crisis_hotline",
-            name="24/7 Crisis Hotline",
-            resource_type="hotline",
-            description="Immediate crisis support available now",
-            location="National",
-            cost_range="Free",
-            contact_info={"phone": "988"},
-            trust_score=1.0,
-            match_score=1.0
-        ))
+        resources.append(_CRISIS_HOTLINE)
     
-    resources.append(ResourceRecommendation(
-        resource_id="university_counseling",
-        name="University Counseling Center",
-        resource_type="counselor",
-        description="Professional counseling services for students",
-        location=location or "Campus",
-        cost_range="Free for students",
-        contact_info={"website": "https://counseling.university.edu"},
-        trust_score=0.95,
-        match_score=0.9
-    ))
+    # Only the counseling center depends on the request, via its location
+    if location:
+        resources.append(_UNIVERSITY_COUNSELING.model_copy(update={"location": location}))
+    else:
+        resources.append(_UNIVERSITY_COUNSELING)
     
-    resources.append(ResourceRecommendation(
-        resource_id="mental_health_app",
-        name="Mindfulness & Meditation App",
-        resource_type="self_help",
-        description="Guided meditation and stress relief exercises",
-        location="Online",
-        cost_range="Free - $10/month",
-        contact_info={"website": "https://example-app.com"},
-        trust_score=0.85,
-        match_score=0.75
-    ))
+    resources.append(_MINDFULNESS_APP)
     
     return resources
 
 
 def _generate_next_steps(urgency: UrgencyLevel) -> list:
     """Generate actionable next steps based on urgency."""
-    if urgency == UrgencyLevel.CRITICAL:
-        return [
-            "Call 988 immediately for crisis support",
-            "Go to your nearest emergency room if you're in immediate danger",
-            "Reach out to a trusted friend or family member",
-            "Use the Crisis Text Line: Text HOME to 741741"
-        ]
-    elif urgency == UrgencyLevel.HIGH:
-        return [
-            "Contact a crisis hotline for immediate support",
-            "Schedule an urgent appointment with a mental health professional",
-            "Reach out to your support network",
-            "Practice grounding techniques to manage acute distress"
-        ]
-    elif urgency == UrgencyLevel.MEDIUM:
-        return [
-            "Schedule an appointment with a counselor",
-            "Explore self-help resources and coping strategies",
-            "Connect with a support group",
-            "Practice self-care activities"
-        ]
+    return list(_NEXT_STEPS.get(urgency, _NEXT_STEPS[UrgencyLevel.LOW]))
+
+
+# Pre-serialized JSON for the request-independent parts of QueryResponse
+_CONTACTS_ADAPTER = TypeAdapter(List[EmergencyContact])
+_ANSWER_ADAPTER = TypeAdapter(SynthesizedAnswer)
+_RESOURCES_ADAPTER = TypeAdapter(List[ResourceRecommendation])
+
+
+def _resources_and_steps_json(urgency: UrgencyLevel, location: str = None) -> bytes:
+    """Serialize the recommended_resources/next_steps members of a QueryResponse."""
+    return (
+        b'"recommended_resources":' + _RESOURCES_ADAPTER.dump_json(_generate_mock_resources(urgency, location))
+        + b',"next_steps":' + orjson.dumps(_generate_next_steps(urgency))
+    )
+
+
+_STATIC_RESOURCES_JSON = {urgency: _resources_and_steps_json(urgency) for urgency in UrgencyLevel}
+
+
+def _render_query_response(
+    response_id: str,
+    session_id: Optional[str],
+    urgency_level: UrgencyLevel,
+    emergency_contacts: List[EmergencyContact],
+    synthesized_answer: SynthesizedAnswer,
+    user_location: Optional[str],
+    timestamp: datetime
+) -> bytes:
+    """
+    Assemble a QueryResponse JSON body, field for field in model order.
+    
+    Only the dynamic members are serialized per request; resources and next
+    steps come from _STATIC_RESOURCES_JSON unless a location override applies.
+    """
+    if user_location:
+        resources_and_steps = _resources_and_steps_json(urgency_level, user_location)
     else:
-        return [
-            "Explore the recommended resources",
-            "Learn more about mental wellness practices",
-            "Consider preventive mental health support",
-            "Build a self-care routine"
-        ]
+        resources_and_steps = _STATIC_RESOURCES_JSON[urgency_level]
+    
+    return b"".join((
+        b'{"response_id":', orjson.dumps(response_id),
+        b',"session_id":', orjson.dumps(session_id),
+        b',"urgency_level":', orjson.dumps(urgency_level.value),
+        b',"emergency_contacts":', _CONTACTS_ADAPTER.dump_json(emergency_contacts),
+        b',"synthesized_answer":', _ANSWER_ADAPTER.dump_json(synthesized_answer),
+        b',', resources_and_steps,
+        # OPT_UTC_Z matches pydantic's "Z" suffix for UTC datetimes
+        b',"timestamp":', orjson.dumps(timestamp, option=orjson.OPT_UTC_Z),
+        b'}',
+    ))
 
 
 # Root endpoint
 @app.get("/")
-async def root():
+async def root() -> Dict[str, str]:
     """Root endpoint with API information."""
     return {
         "name": settings.PROJECT_NAME,
@@ -304,5 +439,7 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=settings.API_RELOAD
+        reload=settings.API_RELOAD,
+        loop="uvloop",
+        http="httptools"
     )
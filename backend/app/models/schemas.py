@@ -1,11 +1,13 @@
 """
 Pydantic models for API request and response validation.
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+from app.utils.clock import utc_now
+
 
 class UrgencyLevel(str, Enum):
     """Urgency classification levels."""
@@ -34,17 +36,20 @@ class SourceType(str, Enum):
 # Request Models
 class QueryRequest(BaseModel):
     """User query request model."""
-    query: str = Field(..., min_length=1, max_length=2000, description="User's mental wellness query")
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    query: str = Field(..., max_length=2000, description="User's mental wellness query")
     session_id: Optional[str] = Field(None, description="Session identifier for context tracking")
     user_location: Optional[str] = Field(None, description="User's location for localized resources")
     preferences: Optional[Dict[str, Any]] = Field(default_factory=dict, description="User preferences (cost, insurance, etc.)")
     
-    @validator('query')
+    @field_validator('query')
+    @classmethod
     def query_not_empty(cls, v):
-        """Ensure query is not just whitespace."""
-        if not v.strip():
+        """Ensure query is not just whitespace (already stripped by pydantic-core)."""
+        if not v:
             raise ValueError('Query cannot be empty')
-        return v.strip()
+        return v
 
 
 class TriageRequest(BaseModel):
@@ -64,6 +69,8 @@ class FeedbackRequest(BaseModel):
 # Response Models
 class SourceReference(BaseModel):
     """Reference to an information source."""
+    model_config = ConfigDict(frozen=True)
+    
     source_id: str
     source_name: str
     source_type: SourceType
@@ -75,6 +82,8 @@ class SourceReference(BaseModel):
 
 class EmergencyContact(BaseModel):
     """Emergency hotline information."""
+    model_config = ConfigDict(frozen=True)
+    
     name: str
     phone: str
     description: str
@@ -84,6 +93,8 @@ class EmergencyContact(BaseModel):
 
 class SynthesizedAnswer(BaseModel):
     """RAG-synthesized answer with citations."""
+    model_config = ConfigDict(frozen=True)
+    
     answer: str = Field(..., description="Synthesized answer text")
     confidence: ConfidenceLevel
     confidence_score: float = Field(..., ge=0.0, le=1.0)
@@ -94,6 +105,8 @@ class SynthesizedAnswer(BaseModel):
 
 class ResourceRecommendation(BaseModel):
     """Personalized resource recommendation."""
+    model_config = ConfigDict(frozen=True)
+    
     resource_id: str
     name: str
     resource_type: str  # e.g., "counselor", "support_group", "self_help"
@@ -114,12 +127,7 @@ class QueryResponse(BaseModel):
     synthesized_answer: Optional[SynthesizedAnswer] = None
     recommended_resources: List[ResourceRecommendation] = Field(default_factory=list)
     next_steps: List[str] = Field(default_factory=list, description="Actionable next steps")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class TriageResult(BaseModel):
@@ -136,11 +144,6 @@ class HealthCheckResponse(BaseModel):
     version: str
     timestamp: datetime
     services: Dict[str, str]  # Service name -> status
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class IngestDocumentRequest(BaseModel):
@@ -151,9 +154,9 @@ class IngestDocumentRequest(BaseModel):
     source_type: SourceType
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
     
-    @validator('document_url', 'document_text')
-    def at_least_one_source(cls, v, values):
+    @model_validator(mode='after')
+    def at_least_one_source(self):
         """Ensure either URL or text is provided."""
-        if not v and not values.get('document_text') and not values.get('document_url'):
+        if not self.document_text and not self.document_url:
             raise ValueError('Either document_url or document_text must be provided')
-        return v
+        return self
@@ -0,0 +1,133 @@
+"""
+Memory-mapped chunk store for EchoMind.
+
+Chunk text and its metadata live in an append-only blob file, indexed by a
+fixed-width record table. Both files are mapped read-only, so worker processes
+serving the same directory share the pages through the OS page cache instead
+of each keeping a private copy of the corpus on its heap.
+
+An append writes the new payloads to the end of the blob first, then publishes
+a new record table with os.replace. Readers, and a restart after a crash in
+mid-ingest, therefore only ever see complete records; bytes past the last
+record are ignored. Appends from several processes (e.g. API workers) are
+serialized with an exclusive flock on a lock file in the directory, and each
+one starts from the record table as it is on disk at that point.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+import fcntl
+import mmap
+import os
+
+import numpy as np
+import orjson
+
+# Text occupies [offset, offset + text_len); the JSON payload follows directly
+_RECORD_DTYPE = np.dtype([
+    ("offset", "<i8"),
+    ("text_len", "<i8"),
+    ("meta_len", "<i8"),
+    ("doc_id", "<i8"),
+])
+
+_RECORDS_FILE = "chunks.idx"
+_BLOB_FILE = "chunks.bin"
+_LOCK_FILE = "chunks.lock"
+
+
+class CorpusStore:
+    """Append-only, memory-mapped sequence of chunk texts."""
+
+    def __init__(self, directory: str):
+        """Open (creating if needed) the store in the given directory."""
+        os.makedirs(directory, exist_ok=True)
+        self._records_path = os.path.join(directory, _RECORDS_FILE)
+        self._blob_path = os.path.join(directory, _BLOB_FILE)
+        self._lock_path = os.path.join(directory, _LOCK_FILE)
+        open(self._blob_path, "ab").close()
+        # (records, blob) swapped as one tuple so readers never pair a new
+        # record table with an old, shorter mapping
+        self._view = self._map()
+
+    def _map(self) -> Tuple[np.ndarray, mmap.mmap]:
+        """Map the current record table and blob read-only."""
+        if os.path.exists(self._records_path) and os.path.getsize(self._records_path):
+            records = np.memmap(self._records_path, dtype=_RECORD_DTYPE, mode="r")
+        else:
+            records = np.zeros(0, dtype=_RECORD_DTYPE)
+
+        blob = None
+        if len(records):
+            with open(self._blob_path, "rb") as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return records, blob
+
+    def __len__(self) -> int:
+        return len(self._view[0])
+
+    def __getitem__(self, i: int) -> str:
+        """Text of chunk i."""
+        records, blob = self._view
+        offset, text_len = int(records[i]["offset"]), int(records[i]["text_len"])
+        return blob[offset:offset + text_len].decode("utf-8")
+
+    def entries(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[str, str, Dict, int]]:
+        """Yield (chunk_id, text, metadata, doc_id) for stored chunks [start, stop)."""
+        records, blob = self._view
+        for offset, text_len, meta_len, doc_id in records[start:stop].tolist():
+            meta_start = offset + text_len
+            payload = orjson.loads(blob[meta_start:meta_start + meta_len])
+            yield payload["id"], blob[offset:meta_start].decode("utf-8"), payload["meta"], doc_id
+
+    def append(
+        self, doc_ids: List[int], chunk_ids: List[str], chunks: List[str], metadatas: List[Dict]
+    ) -> Tuple[int, int]:
+        """
+        Durably append a batch of chunks, given as parallel per-chunk lists.
+
+        doc_ids number the batch's documents from 0; the store offsets them
+        past every document already stored. Metadata must be JSON-serializable;
+        the caller strips derived values.
+
+        Returns:
+            (row of the first appended chunk, doc_id given to batch document 0).
+            Rows before the first one that the caller has not seen were
+            appended by other processes.
+        """
+        with open(self._lock_path, "ab") as lock:
+            # Held until the file closes
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+            # Another process may have appended since this one last mapped
+            self._view = self._map()
+            records = self._view[0]
+            first_row = len(records)
+            first_doc_id = int(records["doc_id"].max()) + 1 if first_row else 0
+
+            # Start after any bytes orphaned by an interrupted append
+            pos = os.path.getsize(self._blob_path)
+            rows = np.empty(len(chunks), dtype=_RECORD_DTYPE)
+            parts = []
+            for i, (doc_id, chunk_id, chunk, meta) in enumerate(zip(doc_ids, chunk_ids, chunks, metadatas)):
+                text = chunk.encode("utf-8")
+                payload = orjson.dumps({"id": chunk_id, "meta": meta})
+                rows[i] = (pos, len(text), len(payload), first_doc_id + doc_id)
+                parts.append(text)
+                parts.append(payload)
+                pos += len(text) + len(payload)
+
+            with open(self._blob_path, "ab") as f:
+                f.write(b"".join(parts))
+                f.flush()
+                os.fsync(f.fileno())
+
+            tmp_path = self._records_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.concatenate([records, rows]).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._records_path)
+
+            # Old mappings are left to the garbage collector, since a concurrent
+            # reader may still be slicing them
+            self._view = self._map()
+        return first_row, first_doc_id
@@ -0,0 +1,105 @@
+"""
+Query micro-batching for EchoMind.
+
+Concurrent /query requests submit their query here instead of calling the
+RAG service directly. A background task collects whatever arrives within
+QUERY_BATCH_MAX_DELAY_MS (up to QUERY_BATCH_MAX_SIZE queries) and retrieves
+them with one RAGService.retrieve_many call, so the embedding model and the
+dense index each run once per batch rather than once per request. A query
+that arrives while nothing else is waiting is dispatched without the delay.
+"""
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+from app.services.rag_service import RAGService
+from loguru import logger
+
+
+class QueryBatcher:
+    """Coalesces concurrent retrievals into batched RAGService calls."""
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        executor: Executor,
+        max_batch_size: int = 16,
+        max_delay: float = 0.01
+    ):
+        """
+        Args:
+            rag_service: Service that performs the retrieval
+            executor: Pool the blocking retrieve_many call runs on
+            max_batch_size: Most queries retrieved in one call
+            max_delay: Seconds to wait for more queries once a batch has company
+        """
+        self.rag_service = rag_service
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: "asyncio.Queue[Tuple[str, str, asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the batching task on the running event loop."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batching task, failing any queries still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Query batcher stopped"))
+
+    async def submit(self, query: str, query_folded: Optional[str] = None) -> List[Dict]:
+        """Retrieve documents for one query as part of the next batch."""
+        if query_folded is None:
+            query_folded = self.rag_service.fold_query(query)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, query_folded, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Collect queued queries into batches and retrieve them until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Only hold the batch open when other queries are already in flight
+            if not self._queue.empty():
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Skip callers that gave up (e.g. client disconnect) while queued
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+
+            queries = [query for query, _, _ in batch]
+            queries_folded = [folded for _, folded, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor,
+                    partial(self.rag_service.retrieve_many, queries, queries_folded=queries_folded)
+                )
+            except Exception as e:
+                logger.error(f"Error retrieving query batch: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            if len(batch) > 1:
+                logger.info(f"Retrieved a batch of {len(batch)} queries")
+            for (_, _, future), docs in zip(batch, results):
+                if not future.done():
+                    future.set_result(docs)
@@ -2,10 +2,25 @@
 RAG (Retrieval-Augmented Generation) Service for EchoMind.
 
 This is a lightweight, in-memory implementation that avoids heavy ML/vector DB
-dependencies so the project can run without native build tools.
+dependencies so the project can run without native build tools. Retrieval is
+served from an inverted index scored with Okapi BM25, or from a FAISS HNSW
+index over sentence-transformer embeddings when USE_DENSE_RETRIEVAL is set
+and the optional dependencies are installed.
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple
+from bisect import bisect_right
+from collections import Counter, OrderedDict
 from datetime import datetime
+import atexit
+import hashlib
+import importlib.util
+import math
+import os
+import re
+import threading
+
+import numpy as np
+from cachetools import TTLCache
 
 from app.core.config import settings
 from app.models.schemas import (
@@ -14,8 +29,90 @@ from app.models.schemas import (
     ConfidenceLevel,
     SourceType,
 )
+from app.services.corpus_store import CorpusStore
+from app.utils.clock import utc_now
+from app.utils.ids import new_chunk_ids
 from loguru import logger
 
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Dense retrieval is optional
+    faiss = None
+    SentenceTransformer = None
+
+# Word tokenizer shared by ingestion and querying
+_TOKEN_RE = re.compile(r"\w+")
+
+# BM25 free parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Packages each non-torch SentenceTransformer backend needs at load time
+_BACKEND_EXTRAS = {"onnx": ("optimum", "onnxruntime"), "openvino": ("optimum", "openvino")}
+
+# Shared SentenceTransformer.encode options: normalized numpy output, and no
+# progress bar on the request path
+_ENCODE_KWARGS = {"convert_to_numpy": True, "normalize_embeddings": True, "show_progress_bar": False}
+
+# Query embedding reuse on the dense path: exact repeats skip the encoder, and
+# near-duplicates (cosine >= threshold) reuse the ranking of an earlier query
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+SIMILAR_QUERY_CACHE_SIZE = 256
+SIMILAR_QUERY_THRESHOLD = 0.97
+
+# Embedding models already loaded in this process, keyed by
+# (model, backend, quantization), so re-creating RAGService reuses the weights.
+# Sharing one instance is safe: encode() only runs inference in eval mode.
+_MODEL_CACHE: Dict[Tuple[str, str, str], "SentenceTransformer"] = {}
+_MODEL_LOCK = threading.Lock()
+
+# How long /stats and /health may serve a cached stats snapshot
+STATS_TTL_SECONDS = 1.0
+
+# First sentence of a chunk, bounded so long unpunctuated text stops early
+_FIRST_SENT_RE = re.compile(r"([^.]{0,500})\.")
+
+# Average relevance cut-offs between LOW/MEDIUM and MEDIUM/HIGH confidence
+_CONFIDENCE_CUTS = (0.6, 0.8)
+_CONFIDENCE_LEVELS = (ConfidenceLevel.LOW, ConfidenceLevel.MEDIUM, ConfidenceLevel.HIGH)
+
+# Default follow-up topics when no retrieved chunk carries any
+_DEFAULT_TOPICS = ("stress management", "counseling services", "self-care techniques")
+
+# Fixed text of synthesized answers
+_ANSWER_INTRO = "Based on trusted mental wellness resources, here's what we found regarding your question:\n\n"
+_ANSWER_CONCLUSION = (
+    "\n\nThese insights come from verified sources. "
+    "For personalized guidance, please consult with a mental health professional."
+)
+_FIRST_BULLET = "• "
+_NEXT_BULLET = "\n\n• "
+
+
+class _BM25Index(NamedTuple):
+    """Immutable snapshot of the compiled term-major CSR index."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    tf_data: np.ndarray
+    idf: np.ndarray
+    len_norm: np.ndarray
+
+
+_EMPTY_BM25_INDEX = _BM25Index(
+    indptr=np.zeros(1, dtype=np.int32),
+    indices=np.zeros(0, dtype=np.int32),
+    tf_data=np.zeros(0, dtype=np.int32),
+    idf=np.zeros(0, dtype=np.float32),
+    len_norm=np.zeros(0, dtype=np.float32),
+)
+
+
+def _ensure_f32_2d(x) -> np.ndarray:
+    """View embeddings as the C-contiguous (N, D) float32 array FAISS takes, copying only if needed."""
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    return x.reshape(1, -1) if x.ndim == 1 else x
+
 
 class RAGService:
     """Service for simple information retrieval and synthesis (no external DB)."""
@@ -23,9 +120,250 @@ class RAGService:
     def __init__(self):
         """Initialize an in-memory store for ingested documents."""
         self.top_k = settings.TOP_K_RESULTS
-        # Each entry is a dict with keys: content, metadata
-        self._documents: List[Dict] = []
-        logger.info("RAG Service initialized with in-memory store (no ChromaDB)")
+        # Chunk store, one entry per chunk in each list. Retrieval ranks chunks,
+        # so "doc" below means a chunk row unless stated otherwise. With
+        # CORPUS_STORE_DIR set, chunk text is served from a shared mmap instead.
+        self._store = CorpusStore(settings.CORPUS_STORE_DIR) if settings.CORPUS_STORE_DIR else None
+        self._contents: Sequence[str] = self._store if self._store is not None else []
+        self._metadatas: List[Dict] = []
+        self._doc_len: List[int] = []
+        # Chunk provenance: ingested document number and public chunk id
+        self._chunk_doc_ids: List[int] = []
+        self._chunk_ids: List[str] = []
+        self._num_documents = 0
+        # Inverted index staging: term id -> list of (doc_idx, term frequency)
+        self._term_to_id: Dict[str, int] = {}
+        self._postings: List[List[Tuple[int, int]]] = []
+        # Term-major CSR arrays compiled from the staging lists on demand. The
+        # snapshot is swapped in with a single assignment so concurrent queries
+        # never observe a half-built index.
+        self._index_dirty = False
+        self._bm25 = _EMPTY_BM25_INDEX
+        # Serializes writers (ingest, index compilation) and FAISS access, since
+        # the service is called from a thread pool
+        self._lock = threading.Lock()
+        # Result caches keyed by a normalized query hash. The store version is
+        # bumped on every ingest and mixed into the keys, so stale entries are
+        # never hit and simply age out.
+        self._version = 0
+        self._retrieve_cache = TTLCache(maxsize=settings.CACHE_MAX_SIZE, ttl=settings.CACHE_TTL_SECONDS)
+        self._synthesis_cache = TTLCache(maxsize=settings.CACHE_MAX_SIZE, ttl=settings.CACHE_TTL_SECONDS)
+        self._cache_lock = threading.Lock()
+        # Last stats snapshot for /stats and /health, also under _cache_lock
+        self._stats_cache = TTLCache(maxsize=1, ttl=STATS_TTL_SECONDS)
+        # Dense-path query caches, also guarded by _cache_lock. Similar-query
+        # rankings live in a fixed ring buffer (allocated on first use) and are
+        # dropped whenever the store version moves on.
+        self._query_embeddings: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._similar_version = -1
+        self._similar_embeddings: Optional[np.ndarray] = None
+        self._similar_scores: Optional[np.ndarray] = None
+        self._similar_results: List[Optional[Tuple[int, List[Tuple[int, float]]]]] = []
+        self._similar_count = 0
+        self._similar_next = 0
+        # Optional dense index; row i of the index is chunk i. It is saved next
+        # to the chunk store, when there is one, so restarts skip re-encoding.
+        self.model = None
+        self.index = None
+        self._dense_index_path: Optional[str] = None
+        # Optional multi-process encode pool for bulk ingestion. Its input and
+        # output queues are shared, so one encode may use it at a time.
+        self._encode_pool = None
+        self._encode_pool_lock = threading.Lock()
+        if settings.USE_DENSE_RETRIEVAL:
+            self._init_dense_index()
+        if self._store is not None:
+            self._load_store()
+            logger.info(f"RAG Service initialized with {len(self._contents)} chunks from {settings.CORPUS_STORE_DIR}")
+        else:
+            logger.info("RAG Service initialized with in-memory store (no ChromaDB)")
+
+    def _init_dense_index(self) -> None:
+        """Load the embedding model and create an empty HNSW index."""
+        if faiss is None or SentenceTransformer is None:
+            logger.warning(
+                "USE_DENSE_RETRIEVAL is set but sentence-transformers/faiss are not "
+                "installed; falling back to BM25"
+            )
+            return
+
+        self.model = self._load_embedding_model()
+        dim = self.model.get_sentence_embedding_dimension()
+        # Embeddings are L2-normalized, so inner product is cosine similarity.
+        # The fp16 variant stores vectors at half width and decodes them to
+        # float32 inside the distance kernel.
+        if settings.DENSE_INDEX_FP16:
+            self.index = faiss.IndexHNSWSQ(
+                dim, faiss.ScalarQuantizer.QT_fp16, settings.HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            self.index = faiss.IndexHNSWFlat(dim, settings.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        self._apply_hnsw_ef(settings.HNSW_CONSTRUCTION_EF, settings.HNSW_SEARCH_EF)
+        if self._store is not None:
+            model_slug = settings.EMBEDDING_MODEL.replace("/", "__")
+            suffix = "_fp16" if settings.DENSE_INDEX_FP16 else ""
+            self._dense_index_path = os.path.join(settings.CORPUS_STORE_DIR, f"dense_{model_slug}{suffix}.faiss")
+        logger.info(f"Dense retrieval enabled with {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND})")
+
+        if settings.EMBEDDING_POOL_WORKERS > 0:
+            self._encode_pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * settings.EMBEDDING_POOL_WORKERS
+            )
+            atexit.register(SentenceTransformer.stop_multi_process_pool, self._encode_pool)
+            logger.info(f"Started {settings.EMBEDDING_POOL_WORKERS} embedding worker processes")
+
+    @classmethod
+    def _load_embedding_model(cls):
+        """Return the configured embedding model, loading it on first use in the process."""
+        key = (settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND, settings.EMBEDDING_QUANTIZATION)
+        with _MODEL_LOCK:
+            model = _MODEL_CACHE.get(key)
+            if model is None:
+                model = _MODEL_CACHE[key] = cls._build_embedding_model()
+            return model
+
+    @staticmethod
+    def _build_embedding_model():
+        """
+        Load the sentence embedding model on the configured backend.
+
+        With the ONNX backend and EMBEDDING_QUANTIZATION set, the model is
+        exported once to a dynamically int8-quantized ONNX graph under
+        EMBEDDING_CACHE_DIR and loaded from there on later starts. A backend
+        whose extras are not installed falls back to torch.
+        """
+        backend = settings.EMBEDDING_BACKEND
+        missing = [name for name in _BACKEND_EXTRAS.get(backend, ()) if importlib.util.find_spec(name) is None]
+        if missing:
+            logger.warning(
+                f"EMBEDDING_BACKEND={backend} needs {', '.join(missing)} "
+                f"(sentence-transformers[{backend}]); using the torch backend"
+            )
+            backend = "torch"
+
+        quantization = settings.EMBEDDING_QUANTIZATION
+        if backend != "onnx" or not quantization:
+            return SentenceTransformer(settings.EMBEDDING_MODEL, backend=backend)
+
+        save_dir = os.path.join(settings.EMBEDDING_CACHE_DIR, settings.EMBEDDING_MODEL.replace("/", "__"))
+        file_name = f"onnx/model_qint8_{quantization}.onnx"
+        if not os.path.exists(os.path.join(save_dir, file_name)):
+            try:
+                from sentence_transformers import export_dynamic_quantized_onnx_model
+                model = SentenceTransformer(settings.EMBEDDING_MODEL, backend="onnx")
+                model.save(save_dir)
+                export_dynamic_quantized_onnx_model(
+                    model, quantization, save_dir, file_suffix=f"qint8_{quantization}"
+                )
+            except ImportError:
+                # The ONNX extras are present (checked above); only this
+                # sentence-transformers release lacks the export helper
+                logger.warning(
+                    "EMBEDDING_QUANTIZATION needs sentence-transformers>=3.2; "
+                    "using the unquantized ONNX model"
+                )
+                return SentenceTransformer(settings.EMBEDDING_MODEL, backend="onnx")
+            logger.info(f"Exported {quantization} int8 ONNX model to {save_dir}")
+
+        return SentenceTransformer(save_dir, backend="onnx", model_kwargs={"file_name": file_name})
+
+    def _load_store(self) -> None:
+        """Rebuild the in-memory indexes from the chunks already on disk."""
+        chunks = self._index_stored(0, None)
+        if self.index is None or not chunks:
+            return
+
+        if os.path.exists(self._dense_index_path):
+            saved = faiss.read_index(self._dense_index_path)
+            # A partial ingest may have stored chunks without saving the index
+            if saved.ntotal == len(chunks) and saved.d == self.index.d:
+                self.index = saved
+                # The file carries the ef values it was written with
+                self._apply_hnsw_ef(settings.HNSW_CONSTRUCTION_EF, settings.HNSW_SEARCH_EF)
+                return
+            logger.warning(f"{self._dense_index_path} is out of date with the chunk store; re-encoding")
+
+        self.index.add(self._encode_chunks(chunks))
+        self._save_dense_index()
+
+    def _catch_up_store(self, stop: int) -> None:
+        """
+        Index stored chunks this process has not seen, up to row stop; they
+        were appended by another process. The caller holds the lock.
+        """
+        chunks = self._index_stored(len(self._metadatas), stop)
+        logger.info(f"Indexed {len(chunks)} chunks appended to the store by another process")
+        if self.index is not None:
+            self.index.add(self._encode_chunks(chunks))
+
+    def _index_stored(self, start: int, stop: Optional[int]) -> List[str]:
+        """Load stored chunks [start, stop) into the in-memory indexes and return their text."""
+        chunks = []
+        # Chunks of one document share a timestamp, so parse each one once and
+        # share the datetime as ingest does
+        parsed: Dict[str, datetime] = {}
+        for doc_idx, (chunk_id, chunk, metadata, doc_id) in enumerate(self._store.entries(start, stop), start):
+            ingested_at = metadata.get("ingested_at")
+            if ingested_at is not None:
+                ingested_dt = parsed.get(ingested_at)
+                if ingested_dt is None:
+                    ingested_dt = parsed[ingested_at] = datetime.fromisoformat(ingested_at)
+                metadata["_ingested_dt"] = ingested_dt
+            self._metadatas.append(metadata)
+            self._chunk_doc_ids.append(doc_id)
+            self._chunk_ids.append(chunk_id)
+            self._index_chunk(doc_idx, chunk)
+            chunks.append(chunk)
+            self._num_documents = max(self._num_documents, doc_id + 1)
+
+        if chunks:
+            self._index_dirty = True
+        return chunks
+
+    def _save_dense_index(self) -> None:
+        """Atomically write the dense index to disk; the caller holds the lock."""
+        # Per-process temp file, since workers sharing a store save concurrently
+        tmp_path = f"{self._dense_index_path}.{os.getpid()}.tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, self._dense_index_path)
+
+    def set_hnsw_ef(self, construction_ef: Optional[int] = None, search_ef: Optional[int] = None) -> None:
+        """
+        Retune the dense index at runtime, e.g. a lower construction_ef for a
+        bulk ingest followed by a higher search_ef once queries dominate.
+
+        Args:
+            construction_ef: Candidate list size while inserting (build speed vs. graph quality)
+            search_ef: Candidate list size while searching (latency vs. recall)
+        """
+        if self.index is None:
+            return
+        with self._lock:
+            self._apply_hnsw_ef(construction_ef, search_ef)
+            if search_ef is not None:
+                # Cached rankings were produced at the old recall setting
+                self._version += 1
+
+    def _apply_hnsw_ef(self, construction_ef: Optional[int], search_ef: Optional[int]) -> None:
+        """Set the HNSW ef parameters that are given; the caller holds the lock or owns the index."""
+        if construction_ef is not None:
+            self.index.hnsw.efConstruction = construction_ef
+        if search_ef is not None:
+            self.index.hnsw.efSearch = search_ef
+
+    def warm_up(self) -> None:
+        """
+        Exercise the retrieval path once so the first request does not pay for
+        lazy model graph initialization, allocator growth or index compilation.
+        """
+        if self.model is not None:
+            query_embedding = _ensure_f32_2d(self.model.encode(["warmup"], **_ENCODE_KWARGS))
+            if self.index.ntotal:
+                # Touch the HNSW graph to fault its pages in
+                with self._lock:
+                    self.index.search(query_embedding, 1)
+        if self._index_dirty:
+            self._build_index()
 
     def ingest_document(
         self,
@@ -48,101 +386,448 @@ class RAGService:
         Returns:
             Dictionary with ingestion results
         """
-        try:
-            # For simplicity, treat the whole text as a single "chunk"
-            chunk_metadata = {
-                "source_name": source_name,
-                "source_type": source_type.value,
-                "source_url": source_url or "",
-                "chunk_index": 0,
-                "total_chunks": 1,
-                "ingested_at": datetime.utcnow().isoformat(),
-                **(metadata or {}),
-            }
+        return self.ingest_documents([{
+            "document_text": document_text,
+            "source_name": source_name,
+            "source_type": source_type,
+            "source_url": source_url,
+            "metadata": metadata,
+        }])[0]
+
+    def ingest_documents(self, documents: List[Dict]) -> List[Dict]:
+        """
+        Ingest several documents, embedding all of their chunks in one batch
+        and updating the store under a single lock acquisition.
+
+        Args:
+            documents: Dicts holding the ingest_document arguments
+                (document_text, source_name, source_type and optionally
+                source_url and metadata)
 
-            self._documents.append(
-                {
-                    "content": document_text,
-                    "metadata": chunk_metadata,
+        Returns:
+            One ingestion result per document, in input order
+        """
+        # Keep the parsed datetime alongside the ISO string so answers never
+        # re-parse it
+        ingested_dt = utc_now()
+        ingested_at = ingested_dt.isoformat()
+        results: List[Optional[Dict]] = [None] * len(documents)
+        # (position, source_name, chunks, chunk_ids, chunk_metadatas)
+        pending = []
+
+        for pos, doc in enumerate(documents):
+            try:
+                chunks = self._chunk(doc["document_text"])
+                if not chunks:
+                    raise ValueError("Document contains no text")
+
+                source_name = doc["source_name"]
+                extra_metadata = doc.get("metadata") or {}
+                # Chunks differ only in their index, so copy one template
+                base_meta = {
+                    "source_name": source_name,
+                    "source_type": doc["source_type"].value,
+                    "source_url": doc.get("source_url") or "",
+                    "total_chunks": len(chunks),
+                    "ingested_at": ingested_at,
+                    **extra_metadata,
                 }
-            )
+                chunk_metadatas = [{**base_meta, "chunk_index": i} for i in range(len(chunks))]
+                chunk_ids = new_chunk_ids(len(chunks))
+                pending.append((pos, source_name, chunks, chunk_ids, chunk_metadatas))
+
+            except Exception as e:
+                logger.error(f"Error ingesting document: {e}")
+                results[pos] = {"status": "error", "error": str(e)}
+
+        if not pending:
+            return results
 
-            logger.info(f"Successfully ingested document: {source_name}")
+        try:
+            all_chunks = [chunk for _, _, chunks, _, _ in pending for chunk in chunks]
+
+            # Embed every chunk in one call before touching the store so a
+            # failure leaves it consistent. encode() already length-sorts its
+            # input, so each mini-batch pads to similar lengths.
+            embeddings = None
+            if self.index is not None:
+                embeddings = self._encode_chunks(all_chunks)
+
+            with self._lock:
+                first_doc_id = self._num_documents
+
+                # Persist first so a failed write leaves memory untouched
+                if self._store is not None:
+                    first_row, first_doc_id = self._store.append(
+                        [j for j, (_, _, chunks, _, _) in enumerate(pending) for _ in chunks],
+                        [chunk_id for _, _, _, chunk_ids, _ in pending for chunk_id in chunk_ids],
+                        all_chunks,
+                        [meta for _, _, _, _, metas in pending for meta in metas],
+                    )
+                    # Rows are positions in the store, so take in other
+                    # workers' appends before this batch's
+                    if first_row > len(self._metadatas):
+                        self._catch_up_store(first_row)
+                if embeddings is not None:
+                    self.index.add(embeddings)
+
+                # Index rows and in-memory rows must line up, so record the
+                # chunks before anything else can fail
+                for j, (_, _, chunks, chunk_ids, chunk_metadatas) in enumerate(pending):
+                    doc_id = first_doc_id + j
+                    base_idx = len(self._metadatas)
+                    for i, chunk in enumerate(chunks):
+                        chunk_metadatas[i]["_ingested_dt"] = ingested_dt
+                        if self._store is None:
+                            self._contents.append(chunk)
+                        self._metadatas.append(chunk_metadatas[i])
+                        self._chunk_doc_ids.append(doc_id)
+                        self._chunk_ids.append(chunk_ids[i])
+                        self._index_chunk(base_idx + i, chunk)
+
+                self._num_documents = max(self._num_documents, first_doc_id + len(pending))
+                self._index_dirty = True
+                self._version += 1
+
+                if embeddings is not None and self._dense_index_path is not None:
+                    try:
+                        self._save_dense_index()
+                    except Exception as e:
+                        # The chunks are stored; a restart re-encodes the stale index
+                        logger.warning(f"Could not save dense index to {self._dense_index_path}: {e}")
 
-            return {
+        except Exception as e:
+            logger.error(f"Error ingesting documents: {e}")
+            for pos, *_ in pending:
+                results[pos] = {"status": "error", "error": str(e)}
+            return results
+
+        with self._cache_lock:
+            self._stats_cache.clear()
+        for pos, source_name, chunks, chunk_ids, _ in pending:
+            logger.info(f"Successfully ingested document: {source_name} ({len(chunks)} chunks)")
+            results[pos] = {
                 "status": "success",
                 "source_name": source_name,
-                "chunks_created": 1,
-                "document_ids": [f"{source_name}_0"],
+                "chunks_created": len(chunks),
+                "document_ids": chunk_ids,
             }
+        return results
 
-        except Exception as e:
-            logger.error(f"Error ingesting document: {e}")
-            return {
-                "status": "error",
-                "error": str(e),
-            }
+    def _encode_chunks(self, chunks: List[str]) -> np.ndarray:
+        """
+        Embed chunks for the dense index. Batches larger than one encode batch
+        are spread over the worker pool when one is running; queries always
+        use the in-process model for latency.
+        """
+        if self._encode_pool is not None and len(chunks) > 64:
+            with self._encode_pool_lock:
+                embeddings = self.model.encode_multi_process(
+                    chunks, self._encode_pool, batch_size=32, normalize_embeddings=True
+                )
+        else:
+            embeddings = self.model.encode(chunks, batch_size=64, **_ENCODE_KWARGS)
+        embeddings = _ensure_f32_2d(embeddings)
+        # Dense rows must line up with chunks; never index a short or mixed batch
+        if len(embeddings) != len(chunks):
+            raise RuntimeError(f"Encoder returned {len(embeddings)} embeddings for {len(chunks)} chunks")
+        return embeddings
+
+    def _index_chunk(self, doc_idx: int, chunk: str) -> None:
+        """Stage a chunk's postings and length; the caller holds the lock."""
+        # Tokenize once at ingest so queries only walk postings
+        tokens = self._tokenize(chunk)
+        for term, tf in Counter(tokens).items():
+            term_id = self._term_to_id.get(term)
+            if term_id is None:
+                term_id = self._term_to_id[term] = len(self._postings)
+                self._postings.append([])
+            self._postings[term_id].append((doc_idx, tf))
+        self._doc_len.append(len(tokens))
+
+    def _chunk(self, text: str) -> List[str]:
+        """
+        Split text into overlapping windows of CHUNK_SIZE whitespace tokens.
+
+        Consecutive chunks share CHUNK_OVERLAP tokens so passages that straddle
+        a boundary remain retrievable.
+        """
+        words = text.split()
+        size = settings.CHUNK_SIZE
+        step = max(size - settings.CHUNK_OVERLAP, 1)
+
+        # Windows stop at the first one that reaches the last word
+        n_windows = -(-max(len(words) - size, 0) // step) + 1
+        stop = min(n_windows * step, len(words))
+        return [" ".join(words[start:start + size]) for start in range(0, stop, step)]
+
+    def _build_index(self) -> _BM25Index:
+        """Compile the staged postings into CSR arrays and BM25 statistics."""
+        with self._lock:
+            if not self._index_dirty:
+                return self._bm25
+
+            n_docs = len(self._contents)
+            df = np.fromiter((len(p) for p in self._postings), dtype=np.int32, count=len(self._postings))
+
+            indptr = np.zeros(len(self._postings) + 1, dtype=np.int32)
+            np.cumsum(df, out=indptr[1:])
+            flat = np.array([pair for postings in self._postings for pair in postings], dtype=np.int32).reshape(-1, 2)
+
+            doc_len = np.asarray(self._doc_len, dtype=np.float32)
+            avgdl = float(doc_len.mean()) or 1.0
+
+            self._bm25 = _BM25Index(
+                indptr=indptr,
+                indices=np.ascontiguousarray(flat[:, 0]),
+                tf_data=np.ascontiguousarray(flat[:, 1]),
+                idf=np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32),
+                len_norm=(BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / avgdl)).astype(np.float32),
+            )
+            self._index_dirty = False
+            return self._bm25
 
     def retrieve_relevant_documents(
         self,
         query: str,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        query_folded: Optional[str] = None
     ) -> List[Dict]:
         """
-        Retrieve the most relevant documents for a query using a simple
-        keyword-overlap scoring (no embeddings/vector DB).
+        Retrieve the most relevant chunks for a query using BM25 scoring over
+        the inverted index, or the dense index when it is enabled.
 
         Args:
             query: User's query text
             top_k: Number of documents to retrieve (default from settings)
+            query_folded: fold_query(query), if the caller already has it
+
+        Returns:
+            List of relevant chunks with provenance, metadata and scores
+        """
+        return self.retrieve_many(
+            [query], top_k, None if query_folded is None else [query_folded]
+        )[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        queries_folded: Optional[List[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        Retrieve chunks for several queries at once. On the dense path the
+        uncached queries are encoded in one batch and searched with a single
+        index call.
+
+        Args:
+            queries: User query texts
+            top_k: Number of documents to retrieve per query (default from settings)
+            queries_folded: fold_query() of each query, if the caller already has them
 
         Returns:
-            List of relevant documents with metadata and scores
+            One list of relevant chunks per query, in input order
         """
         try:
             k = top_k or self.top_k
 
-            if not self._documents:
+            if not self._contents:
                 logger.info("No documents available in in-memory store")
-                return []
-
-            query_terms = {t.lower() for t in query.split() if t.strip()}
-            scored_docs: List[Dict] = []
-
-            for doc in self._documents:
-                content_terms = {t.lower() for t in doc["content"].split() if t.strip()}
-                if not content_terms:
-                    continue
-                overlap = query_terms.intersection(content_terms)
-                if not overlap:
-                    score = 0.0
-                else:
-                    score = len(overlap) / len(query_terms or {1})
-
-                scored_docs.append(
-                    {
-                        "content": doc["content"],
-                        "metadata": doc["metadata"],
-                        "distance": 1.0 - score,
-                        "relevance_score": score,
-                    }
-                )
-
-            # Sort by score descending and take top_k
-            scored_docs.sort(key=lambda d: d["relevance_score"], reverse=True)
-            relevant_docs = scored_docs[:k]
-
-            logger.info(f"Retrieved {len(relevant_docs)} relevant documents for query")
-            return relevant_docs
+                return [[] for _ in queries]
+
+            if queries_folded is None:
+                queries_folded = [self.fold_query(query) for query in queries]
+            version = self._version
+            query_keys = [self._query_key(folded) for folded in queries_folded]
+
+            results: List[Optional[List[Dict]]] = [None] * len(queries)
+            with self._cache_lock:
+                for i, query_key in enumerate(query_keys):
+                    results[i] = self._retrieve_cache.get((version, k, query_key))
+            misses = [i for i, cached in enumerate(results) if cached is None]
+            if len(misses) < len(queries):
+                logger.info(f"Retrieved {len(queries) - len(misses)} result sets from cache")
+            if not misses:
+                return results
+
+            if self.index is not None:
+                ranked_lists = self._search_dense([queries[i] for i in misses], k, [query_keys[i] for i in misses])
+            else:
+                ranked_lists = [self._search_sparse(queries_folded[i], k) for i in misses]
+
+            for i, ranked in zip(misses, ranked_lists):
+                relevant_docs: List[Dict] = []
+                for doc_idx, score in ranked:
+                    relevant_docs.append(
+                        {
+                            "chunk_id": self._chunk_ids[doc_idx],
+                            "document_index": self._chunk_doc_ids[doc_idx],
+                            "content": self._contents[doc_idx],
+                            "metadata": self._metadatas[doc_idx],
+                            "distance": 1.0 - score,
+                            "relevance_score": score,
+                        }
+                    )
+                results[i] = relevant_docs
+                logger.info(f"Retrieved {len(relevant_docs)} relevant documents for query")
+
+            with self._cache_lock:
+                for i in misses:
+                    self._retrieve_cache[(version, k, query_keys[i])] = results[i]
+            return results
 
         except Exception as e:
             logger.error(f"Error retrieving documents: {e}")
+            return [[] for _ in queries]
+
+    def _search_sparse(self, query_folded: str, k: int) -> List[Tuple[int, float]]:
+        """Rank documents with BM25, returning (doc_idx, score in [0, 1])."""
+        query_terms = set(_TOKEN_RE.findall(query_folded))
+        if not query_terms:
             return []
 
+        bm25 = self._build_index() if self._index_dirty else self._bm25
+
+        # Terms staged after this snapshot was compiled are treated as unseen
+        n_docs = len(bm25.len_norm)
+        n_terms = len(bm25.idf)
+        term_ids = np.fromiter(
+            (tid for tid in map(self._term_to_id.get, query_terms) if tid is not None and tid < n_terms),
+            dtype=np.int32,
+        )
+        if len(term_ids) == 0:
+            return []
+
+        # Score of a document holding every query term once at average length,
+        # where each term contributes exactly its idf. Relative to it, a score
+        # is the idf-weighted share of query terms matched (as the keyword
+        # overlap ratio was) and saturates at 1.0 for repeated terms or short
+        # documents. Terms absent from the corpus still count, with df = 0.
+        n_unseen = len(query_terms) - len(term_ids)
+        unseen_idf = math.log1p((n_docs + 0.5) / 0.5)
+        full_match_score = float(bm25.idf[term_ids].sum()) + n_unseen * unseen_idf
+
+        # Gather the postings of every query term in one flat array
+        starts = bm25.indptr[term_ids]
+        counts = bm25.indptr[term_ids + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        doc_ids = bm25.indices[offsets]
+        tf = bm25.tf_data[offsets].astype(np.float32)
+        idf = np.repeat(bm25.idf[term_ids], counts)
+
+        contrib = idf * tf * (BM25_K1 + 1.0) / (tf + bm25.len_norm[doc_ids])
+        scores = np.bincount(doc_ids, weights=contrib, minlength=n_docs)
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+
+        # Convert once with tolist() rather than boxing a NumPy scalar per hit
+        relevance = np.minimum(scores[ranked] / full_match_score, 1.0)
+        return list(zip(ranked.tolist(), relevance.tolist()))
+
+    def _search_dense(self, queries: List[str], k: int, query_keys: List[bytes]) -> List[List[Tuple[int, float]]]:
+        """Rank documents by cosine similarity per query, returning (doc_idx, score in [0, 1])."""
+        query_embeddings = self._embed_queries(queries, query_keys)
+        version = self._version
+        results: List[Optional[List[Tuple[int, float]]]] = [None] * len(queries)
+
+        # A near-identical recent query against the same store ranks the same
+        with self._cache_lock:
+            n = self._similar_count
+            if self._similar_version == version and n:
+                sims = self._similar_scores[:n]
+                for i, query_embedding in enumerate(query_embeddings):
+                    # One BLAS matrix-vector product into a preallocated buffer
+                    np.dot(self._similar_embeddings[:n], query_embedding, out=sims)
+                    best = int(sims.argmax())
+                    cached_k, cached_ranked = self._similar_results[best]
+                    if sims[best] >= SIMILAR_QUERY_THRESHOLD and cached_k == k:
+                        results[i] = cached_ranked
+
+        misses = [i for i, ranked in enumerate(results) if ranked is None]
+        if not misses:
+            return results
+
+        with self._lock:
+            similarities, ids = self.index.search(query_embeddings[misses], min(k, self.index.ntotal))
+
+        # Clip and convert the whole result block at once; per-element NumPy
+        # scalars cost more than the arithmetic on them
+        similarities = np.clip(similarities, 0.0, 1.0).tolist()
+        ids = ids.tolist()
+        for row, i in enumerate(misses):
+            # FAISS pads with -1 when fewer than k neighbours are reachable
+            results[i] = [
+                (doc_idx, sim)
+                for sim, doc_idx in zip(similarities[row], ids[row])
+                if doc_idx != -1
+            ]
+
+        with self._cache_lock:
+            if self._similar_embeddings is None:
+                dim = query_embeddings.shape[1]
+                self._similar_embeddings = np.empty((SIMILAR_QUERY_CACHE_SIZE, dim), dtype=np.float32)
+                self._similar_scores = np.empty(SIMILAR_QUERY_CACHE_SIZE, dtype=np.float32)
+                self._similar_results = [None] * SIMILAR_QUERY_CACHE_SIZE
+            if self._similar_version != version:
+                self._similar_version = version
+                self._similar_count = self._similar_next = 0
+
+            # Overwrite the oldest slots once the ring is full
+            for i in misses:
+                slot = self._similar_next
+                self._similar_embeddings[slot] = query_embeddings[i]
+                self._similar_results[slot] = (k, results[i])
+                self._similar_next = (slot + 1) % SIMILAR_QUERY_CACHE_SIZE
+                self._similar_count = min(self._similar_count + 1, SIMILAR_QUERY_CACHE_SIZE)
+        return results
+
+    def _embed_queries(self, queries: List[str], query_keys: List[bytes]) -> np.ndarray:
+        """Encode queries to normalized float32 rows, reusing recent repeats."""
+        embeddings: List[Optional[np.ndarray]] = [None] * len(queries)
+        with self._cache_lock:
+            for i, query_key in enumerate(query_keys):
+                embedding = self._query_embeddings.get(query_key)
+                if embedding is not None:
+                    self._query_embeddings.move_to_end(query_key)
+                    embeddings[i] = embedding
+
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            encoded = _ensure_f32_2d(self.model.encode(
+                [queries[i] for i in misses], batch_size=len(misses), **_ENCODE_KWARGS
+            ))
+
+            with self._cache_lock:
+                for row, i in enumerate(misses):
+                    embeddings[i] = encoded[row]
+                    self._query_embeddings[query_keys[i]] = encoded[row]
+                    if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                        self._query_embeddings.popitem(last=False)
+        return np.stack(embeddings)
+
+    @staticmethod
+    def fold_query(query: str) -> str:
+        """Normalize a query as retrieval and the result caches see it."""
+        return query.strip().casefold()
+
+    @staticmethod
+    def _query_key(query_folded: str) -> bytes:
+        """Hash a folded query for use as a cache key."""
+        return hashlib.blake2b(query_folded.encode(), digest_size=16).digest()
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        """Split text into case-folded word tokens."""
+        return _TOKEN_RE.findall(text.casefold())
+
     def synthesize_answer(
         self,
         query: str,
-        retrieved_docs: List[Dict]
+        retrieved_docs: List[Dict],
+        query_folded: Optional[str] = None
     ) -> SynthesizedAnswer:
         """
         Synthesize an answer from retrieved documents.
@@ -150,6 +835,7 @@ class RAGService:
         Args:
             query: User's original query
             retrieved_docs: List of retrieved relevant documents
+            query_folded: fold_query(query), if the caller already has it
 
         Returns:
             SynthesizedAnswer with synthesized response and citations
@@ -158,31 +844,24 @@ class RAGService:
             if not retrieved_docs:
                 return self._create_no_info_response()
 
-            # Calculate overall confidence based on relevance scores
-            relevance_scores = [doc['relevance_score'] for doc in retrieved_docs]
-            avg_confidence = sum(relevance_scores) / len(relevance_scores)
-
-            # Determine confidence level
-            if avg_confidence >= 0.8:
-                confidence_level = ConfidenceLevel.HIGH
-            elif avg_confidence >= 0.6:
-                confidence_level = ConfidenceLevel.MEDIUM
-            else:
-                confidence_level = ConfidenceLevel.LOW
-
-            # Extract unique sources
-            sources = self._extract_sources(retrieved_docs)
-
-            # Synthesize answer from multiple documents
-            synthesized_text = self._synthesize_text(query, retrieved_docs)
+            # Identical retrieval sets produce identical answers, so reuse them
+            cache_key = (
+                self._version,
+                self._query_key(query_folded if query_folded is not None else self.fold_query(query)),
+                tuple((doc['chunk_id'], doc['relevance_score']) for doc in retrieved_docs),
+            )
+            with self._cache_lock:
+                cached = self._synthesis_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
-            # Extract key points
-            key_points = self._extract_key_points(retrieved_docs)
+            # Calculate overall confidence based on relevance scores
+            avg_confidence = sum(doc['relevance_score'] for doc in retrieved_docs) / len(retrieved_docs)
+            confidence_level = _CONFIDENCE_LEVELS[bisect_right(_CONFIDENCE_CUTS, avg_confidence)]
 
-            # Generate related topics
-            related_topics = self._generate_related_topics(retrieved_docs)
+            synthesized_text, sources, key_points, related_topics = self._build_outputs(retrieved_docs)
 
-            return SynthesizedAnswer(
+            answer = SynthesizedAnswer(
                 answer=synthesized_text,
                 confidence=confidence_level,
                 confidence_score=float(avg_confidence),
@@ -191,38 +870,40 @@ class RAGService:
                 related_topics=related_topics
             )
 
+            with self._cache_lock:
+                self._synthesis_cache[cache_key] = answer
+            return answer
+
         except Exception as e:
             logger.error(f"Error synthesizing answer: {e}")
             return self._create_error_response()
     
-    def _synthesize_text(self, query: str, docs: List[Dict]) -> str:
+    def _build_outputs(self, docs: List[Dict]) -> Tuple[str, List[SourceReference], List[str], List[str]]:
         """
-        Synthesize text from multiple documents.
+        Build the answer text, unique sources, key points and related topics
+        in a single pass over the retrieved documents.
         For production, this would use an LLM. For now, we do basic extraction.
         """
-        # Combine relevant excerpts
-        excerpts = []
-        for doc in docs[:3]:  # Use top 3 documents
-            content = doc['content']
-            # Take first 200 characters as excerpt
-            excerpt = content[:200] + "..." if len(content) > 200 else content
-            excerpts.append(excerpt)
-        
-        # Create synthesized answer
-        intro = f"Based on trusted mental wellness resources, here's what we found regarding your question:\n\n"
-        body = "\n\n".join([f"• {excerpt}" for excerpt in excerpts])
-        conclusion = "\n\nThese insights come from verified sources. For personalized guidance, please consult with a mental health professional."
-        
-        return intro + body + conclusion
-    
-    def _extract_sources(self, docs: List[Dict]) -> List[SourceReference]:
-        """Extract unique source references from retrieved documents."""
+        # Answer: intro, bulleted excerpts of the top 3 documents, conclusion
+        parts = [_ANSWER_INTRO]
+        key_points = []
         sources_dict = {}
-        
-        for doc in docs:
+        topics = set()
+
+        for i, doc in enumerate(docs):
             metadata = doc['metadata']
+            content = doc['content']
+
+            if i < 3:
+                parts.append(_FIRST_BULLET if i == 0 else _NEXT_BULLET)
+                parts.append(content[:200] + "..." if len(content) > 200 else content)
+                # Simple key point extraction (first sentence) - in production, use NLP
+                m = _FIRST_SENT_RE.match(content)
+                first = m.group(1) if m else content.partition('.')[0]
+                key_points.append(first.strip() + ".")
+
+            # Chunks of an already-cited source add nothing
             source_name = metadata.get('source_name', 'Unknown')
-            
             if source_name not in sources_dict:
                 sources_dict[source_name] = SourceReference(
                     source_id=source_name.replace(" ", "_").lower(),
@@ -230,37 +911,20 @@ class RAGService:
                     source_type=metadata.get('source_type', 'ngo'),
                     source_url=metadata.get('source_url'),
                     trust_score=metadata.get('trust_score', 0.8),
-                    last_verified=datetime.fromisoformat(metadata.get('ingested_at', datetime.utcnow().isoformat())),
-                    excerpt=doc['content'][:150] + "..." if len(doc['content']) > 150 else doc['content']
+                    last_verified=metadata.get('_ingested_dt') or utc_now(),
+                    excerpt=content[:150] + "..." if len(content) > 150 else content
                 )
-        
-        return list(sources_dict.values())
-    
-    def _extract_key_points(self, docs: List[Dict]) -> List[str]:
-        """Extract key points from documents."""
-        # Simple extraction - in production, use NLP
-        key_points = []
-        for doc in docs[:3]:
-            sentences = doc['content'].split('.')
-            if sentences:
-                key_points.append(sentences[0].strip() + ".")
-        
-        return key_points[:5]  # Return top 5 key points
-    
-    def _generate_related_topics(self, docs: List[Dict]) -> List[str]:
-        """Generate related topics for follow-up."""
-        # Extract topics from metadata or content
-        topics = set()
-        for doc in docs:
-            metadata = doc['metadata']
+
             if 'topics' in metadata:
                 topics.update(metadata['topics'].split(','))
-        
+
+        parts.append(_ANSWER_CONCLUSION)
+
         # Default related topics if none found
         if not topics:
-            topics = {"stress management", "counseling services", "self-care techniques"}
-        
-        return list(topics)[:5]
+            topics = set(_DEFAULT_TOPICS)
+
+        return "".join(parts), list(sources_dict.values()), key_points, list(topics)[:5]
     
     def _create_no_info_response(self) -> SynthesizedAnswer:
         """Create response when no relevant information is found."""
@@ -285,14 +949,23 @@ class RAGService:
         )
     
     def get_collection_stats(self) -> Dict:
-        """Get statistics about the in-memory collection."""
+        """Get statistics about the in-memory collection (cached briefly)."""
         try:
-            count = len(self._documents)
-            return {
+            with self._cache_lock:
+                stats = self._stats_cache.get("stats")
+            if stats is not None:
+                return stats
+
+            count = self._num_documents
+            stats = {
                 "total_documents": count,
+                "total_chunks": len(self._contents),
                 "collection_name": settings.CHROMA_COLLECTION_NAME,
                 "status": "healthy" if count > 0 else "empty",
             }
+            with self._cache_lock:
+                self._stats_cache["stats"] = stats
+            return stats
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
             return {"status": "error", "error": str(e)}
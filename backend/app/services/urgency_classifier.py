@@ -2,12 +2,58 @@
 Urgency Classification Service for EchoMind.
 Detects crisis keywords and classifies urgency level of user queries.
 """
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple, Iterable
 import re
+import threading
 from app.models.schemas import UrgencyLevel, EmergencyContact
 from app.core.config import settings
 from loguru import logger
 
+try:
+    import hyperscan
+except ImportError:  # Optional; x86-64 only
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional; falls back to Python regex matching
+    ahocorasick = None
+
+# Severity bits OR-ed into the per-query match bitmap
+CRITICAL_BIT = 4
+HIGH_BIT = 2
+MEDIUM_BIT = 1
+
+# Risk score contribution of each matched keyword, by severity bit
+RISK_WEIGHTS = {CRITICAL_BIT: 0.4, HIGH_BIT: 0.2, MEDIUM_BIT: 0.1}
+
+
+def _is_word_char(ch: str) -> bool:
+    """True if ch is a regex word character (\\w) in Unicode mode."""
+    return ch.isalnum() or ch == '_'
+
+
+def _is_boundary(text: str, i: int) -> bool:
+    """True if a regex word boundary (\\b) lies between text[i] and text[i + 1]."""
+    before = i >= 0 and _is_word_char(text[i])
+    after = i + 1 < len(text) and _is_word_char(text[i + 1])
+    return before != after
+
+
+def _is_byte_boundary(data: bytes, pos: int) -> bool:
+    """True if a Unicode word boundary lies at byte offset pos of UTF-8 data."""
+    # Widen each side to the whole code point touching pos, skipping
+    # continuation bytes (0b10xxxxxx)
+    start = pos - 1
+    while start > 0 and data[start] & 0xC0 == 0x80:
+        start -= 1
+    end = pos + 1
+    while end < len(data) and data[end] & 0xC0 == 0x80:
+        end += 1
+    before = pos > 0 and _is_word_char(data[start:pos].decode('utf-8'))
+    after = pos < len(data) and _is_word_char(data[pos:end].decode('utf-8'))
+    return before != after
+
 
 class UrgencyClassifier:
     """Classifier for detecting urgency level in user queries."""
@@ -37,6 +83,27 @@ class UrgencyClassifier:
             'overwhelmed', 'burnout', 'exhausted', 'sleepless'
         }
         
+        # Flat keyword table; a keyword's position is its match id
+        self._keywords: List[Tuple[str, int]] = (
+            [(kw, CRITICAL_BIT) for kw in sorted(self.critical_keywords)]
+            + [(kw, HIGH_BIT) for kw in sorted(self.high_urgency_keywords)]
+            + [(kw, MEDIUM_BIT) for kw in sorted(self.medium_urgency_keywords)]
+        )
+        # Matchers in order of preference: hyperscan, Aho-Corasick, regex
+        self._hs_db = self._compile_hyperscan() if hyperscan is not None else None
+        # A scratch space serves one scan at a time, and classification runs
+        # on the request thread pool, so each thread allocates its own
+        self._hs_local = threading.local()
+        self._automaton = None
+        if self._hs_db is None and ahocorasick is not None:
+            self._automaton = self._build_automaton()
+        elif self._hs_db is None:
+            self._keyword_ids = {kw: kw_id for kw_id, (kw, _) in enumerate(self._keywords)}
+            self._bucket_patterns = [
+                self._compile_bucket(keywords)
+                for keywords in (self.critical_keywords, self.high_urgency_keywords, self.medium_urgency_keywords)
+            ]
+        
         # Emergency contacts by country
         self.emergency_contacts = {
             'US': EmergencyContact(
@@ -62,27 +129,138 @@ class UrgencyClassifier:
             )
         }
         
-        logger.info("Urgency Classifier initialized")
+        matcher = 'hyperscan' if self._hs_db else 'aho-corasick' if self._automaton else 'regex'
+        logger.info(f"Urgency Classifier initialized ({matcher} matcher)")
+    
+    def _compile_hyperscan(self):
+        """
+        Compile every keyword into one Hyperscan database (a single DFA scan).
+        
+        Hyperscan's \\b is ASCII-only (and unsupported with HS_FLAG_UCP), so
+        the patterns are plain literals and _match_keywords checks Unicode
+        word boundaries on each hit, as the Aho-Corasick path does.
+        """
+        expressions = [re.escape(kw).encode() for kw, _ in self._keywords]
+        # Matched byte length per id, to recover where each hit starts
+        self._hs_lengths = [len(kw.encode('utf-8')) for kw, _ in self._keywords]
+        db = hyperscan.Database()
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[hyperscan.HS_FLAG_CASELESS] * len(expressions),
+        )
+        return db
+    
+    def _build_automaton(self):
+        """Build one Aho-Corasick automaton over every keyword (a single linear scan)."""
+        automaton = ahocorasick.Automaton()
+        for kw_id, (kw, _) in enumerate(self._keywords):
+            automaton.add_word(kw, (kw_id, len(kw)))
+        automaton.make_automaton()
+        return automaton
+    
+    @staticmethod
+    def _compile_bucket(keywords: Iterable[str]) -> re.Pattern:
+        """
+        Compile a severity bucket into a single alternation.
+        
+        Longer keywords are tried first, and the lookahead lets matches
+        overlap, so "breakdown" is still found inside "mental breakdown".
+        """
+        alternation = '|'.join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+        return re.compile(r'(?=\b(' + alternation + r')\b)', re.IGNORECASE)
     
-    def classify_urgency(self, query: str) -> Tuple[UrgencyLevel, List[EmergencyContact]]:
+    def _match_keywords(self, text: str) -> Set[int]:
+        """
+        Find which keywords occur in the text.
+        
+        Args:
+            text: Text to search
+            
+        Returns:
+            Set of matched keyword ids (indexes into self._keywords)
+        """
+        if self._hs_db is not None:
+            scratch = getattr(self._hs_local, 'scratch', None)
+            if scratch is None:
+                scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+            data = text.encode('utf-8')
+            matched: Set[int] = set()
+            
+            def on_match(kw_id, start, end, flags, ctx):
+                if _is_byte_boundary(data, end - self._hs_lengths[kw_id]) and _is_byte_boundary(data, end):
+                    matched.add(kw_id)
+            
+            self._hs_db.scan(data, match_event_handler=on_match, scratch=scratch)
+            return matched
+        
+        if self._automaton is not None:
+            # The automaton matches inside words too, so enforce the same word
+            # boundaries as the regex matchers
+            return {
+                kw_id
+                for end, (kw_id, length) in self._automaton.iter(text)
+                if _is_boundary(text, end - length) and _is_boundary(text, end)
+            }
+        
+        # One regex scan per severity bucket
+        return {
+            self._keyword_ids[match.lower()]
+            for pattern in self._bucket_patterns
+            for match in pattern.findall(text)
+        }
+    
+    def _severity_bitmap(self, matched: Set[int]) -> int:
+        """OR together the severity bits of the matched keywords."""
+        bitmap = 0
+        for kw_id in matched:
+            bitmap |= self._keywords[kw_id][1]
+        return bitmap
+    
+    def classify_urgency(
+        self, query: str, normalized: bool = False
+    ) -> Tuple[UrgencyLevel, List[EmergencyContact]]:
         """
         Classify the urgency level of a user query.
         
         Args:
             query: User's query text
+            normalized: True if query is already lowercased (e.g. RAGService.fold_query)
             
         Returns:
             Tuple of (UrgencyLevel, List of relevant emergency contacts)
         """
-        query_lower = query.lower()
+        return self._urgency_from_matches(self._match_keywords(query if normalized else query.lower()))
+    
+    def classify_and_score(
+        self, query: str, normalized: bool = False
+    ) -> Tuple[UrgencyLevel, float, List[EmergencyContact]]:
+        """
+        Classify urgency and compute the risk score from one keyword scan.
+        
+        Args:
+            query: User's query text
+            normalized: True if query is already lowercased (e.g. RAGService.fold_query)
+            
+        Returns:
+            Tuple of (UrgencyLevel, risk score, List of relevant emergency contacts)
+        """
+        matched = self._match_keywords(query if normalized else query.lower())
+        urgency, contacts = self._urgency_from_matches(matched)
+        return urgency, self._risk_from_matches(matched), contacts
+    
+    def _urgency_from_matches(self, matched: Set[int]) -> Tuple[UrgencyLevel, List[EmergencyContact]]:
+        """Map matched keyword ids to the urgency level and its contacts."""
+        bitmap = self._severity_bitmap(matched)
         
         # Check for critical keywords
-        if self._contains_keywords(query_lower, self.critical_keywords):
+        if bitmap & CRITICAL_BIT:
             logger.warning(f"CRITICAL urgency detected in query")
             return UrgencyLevel.CRITICAL, list(self.emergency_contacts.values())
         
         # Check for high urgency keywords
-        if self._contains_keywords(query_lower, self.high_urgency_keywords):
+        if bitmap & HIGH_BIT:
             logger.info(f"HIGH urgency detected in query")
             return UrgencyLevel.HIGH, [
                 self.emergency_contacts['US'],
@@ -90,7 +268,7 @@ class UrgencyClassifier:
             ]
         
         # Check for medium urgency keywords
-        if self._contains_keywords(query_lower, self.medium_urgency_keywords):
+        if bitmap & MEDIUM_BIT:
             logger.info(f"MEDIUM urgency detected in query")
             return UrgencyLevel.MEDIUM, []
         
@@ -98,24 +276,6 @@ class UrgencyClassifier:
         logger.info(f"LOW urgency detected in query")
         return UrgencyLevel.LOW, []
     
-    def _contains_keywords(self, text: str, keywords: set) -> bool:
-        """
-        Check if text contains any of the specified keywords.
-        
-        Args:
-            text: Text to search
-            keywords: Set of keywords to look for
-            
-        Returns:
-            True if any keyword is found
-        """
-        for keyword in keywords:
-            # Use word boundaries for more accurate matching
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
-    
     def get_risk_score(self, query: str) -> float:
         """
         Calculate a risk score (0-1) for the query.
@@ -126,23 +286,12 @@ class UrgencyClassifier:
         Returns:
             Risk score between 0 (low risk) and 1 (high risk)
         """
-        query_lower = query.lower()
-        score = 0.0
-        
-        # Count critical keywords
-        critical_count = sum(1 for kw in self.critical_keywords 
-                           if self._contains_keywords(query_lower, {kw}))
-        score += critical_count * 0.4
-        
-        # Count high urgency keywords
-        high_count = sum(1 for kw in self.high_urgency_keywords 
-                        if self._contains_keywords(query_lower, {kw}))
-        score += high_count * 0.2
-        
-        # Count medium urgency keywords
-        medium_count = sum(1 for kw in self.medium_urgency_keywords 
-                          if self._contains_keywords(query_lower, {kw}))
-        score += medium_count * 0.1
+        return self._risk_from_matches(self._match_keywords(query.lower()))
+    
+    def _risk_from_matches(self, matched: Set[int]) -> float:
+        """Sum the severity weights of the matched keywords, capped at 1.0."""
+        # Each distinct matched keyword contributes its severity weight
+        score = sum(RISK_WEIGHTS[self._keywords[kw_id][1]] for kw_id in matched)
         
         # Cap at 1.0
         return min(score, 1.0)
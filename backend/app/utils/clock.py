@@ -0,0 +1,39 @@
+"""
+Coarse UTC clock for EchoMind.
+
+Request handlers read a timestamp that a background task refreshes every
+CLOCK_RESOLUTION_SECONDS, instead of building a new datetime per request.
+Responses serialize it with orjson, so no string form is cached. Outside the
+running app (scripts, a REPL) the refresher is not active and utc_now falls
+back to reading the system clock directly.
+"""
+from datetime import datetime, timezone
+import asyncio
+
+# How often the cached timestamp is refreshed
+CLOCK_RESOLUTION_SECONDS = 0.5
+
+_NOW = {"dt": None}
+
+
+def _tick() -> None:
+    """Refresh the cached timestamp."""
+    _NOW["dt"] = datetime.now(timezone.utc)
+
+
+def utc_now() -> datetime:
+    """Current UTC time (timezone-aware), at clock resolution when cached."""
+    if _NOW["dt"] is None:
+        return datetime.now(timezone.utc)
+    return _NOW["dt"]
+
+
+async def run_clock() -> None:
+    """Keep the cached timestamp fresh until cancelled."""
+    try:
+        while True:
+            _tick()
+            await asyncio.sleep(CLOCK_RESOLUTION_SECONDS)
+    finally:
+        # Stop serving a frozen timestamp once nothing refreshes it
+        _NOW["dt"] = None
@@ -0,0 +1,29 @@
+"""
+Identifier generation for EchoMind.
+
+Response ids are UUIDv7: time-ordered, so they sort by creation time and keep
+downstream indexes append-friendly. The Rust-backed uuid-utils generator is
+used when installed, then the standard library's (Python 3.14+), and random
+UUIDv4 otherwise. Chunk ids only need to be unique, so they share one short
+random UUIDv4 prefix per document.
+"""
+from typing import List
+import uuid
+
+try:
+    from uuid_utils import uuid7
+except ImportError:
+    uuid7 = getattr(uuid, "uuid7", None)
+
+
+def new_response_id() -> str:
+    """Return a new response id in canonical 36-character UUID form."""
+    if uuid7 is not None:
+        return str(uuid7())
+    return str(uuid.uuid4())
+
+
+def new_chunk_ids(count: int) -> List[str]:
+    """Return ids for a document's chunks: one random prefix plus the chunk index."""
+    prefix = uuid.uuid4().hex[:12]
+    return [f"{prefix}_{i}" for i in range(count)]